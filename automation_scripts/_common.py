@@ -0,0 +1,151 @@
+import argparse
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+import cli
+
+logger = logging.getLogger(__name__)
+
+# One monitor shared by every automation script in this process: the
+# cpu_percent baseline only needs seeding once and the Process cache is
+# reused across consumers
+SHARED_MONITOR = cli.SystemMonitor()
+
+# argparse type= callables so range checks happen at parse time with a
+# proper usage message instead of post-parse if-chains
+def percent(value):
+    v = int(value)
+    if v < 0 or v > 100:
+        raise argparse.ArgumentTypeError(f"{value} must be between 0 and 100")
+    return v
+
+def positive_int(value):
+    v = int(value)
+    if v < 1:
+        raise argparse.ArgumentTypeError(f"{value} must be at least 1")
+    return v
+
+# The cpu/memory scalars every consumer reads per tick, pulled out of
+# the nested dict in one place. Missing or malformed keys read as 0.0,
+# which can never breach a threshold.
+def extract_cpu_mem(stats):
+    stats = stats or {}
+    return ((stats.get('cpu') or {}).get('overall_percent', 0.0),
+            (stats.get('memory') or {}).get('percent', 0.0))
+
+# Consumers polling within the TTL window reuse the last collected
+# stats dict instead of rescanning the process table. Set to 0 to
+# disable caching where freshness matters.
+STATS_TTL = 2.0
+_stats_cache = (0.0, None, False)
+
+def clear_stats_cache():
+    global _stats_cache
+    _stats_cache = (0.0, None, False)
+
+# Escape hatch back to the pre-refactor behavior of spawning
+# 'cli.py --json' in a child process, e.g. to isolate a psutil crash
+_USE_SUBPROCESS = os.getenv('SYSTEM_ADVISOR_USE_SUBPROCESS') == '1'
+
+# Opt-in: point this at a running stats_daemon socket and polls become
+# one round-trip over a Unix socket instead of a local collection
+_SOCKET_PATH = os.getenv('SYSTEM_ADVISOR_SOCKET')
+_daemon_sock = None
+_daemon_reader = None
+
+def _close_daemon():
+    global _daemon_sock, _daemon_reader
+    for closable in (_daemon_reader, _daemon_sock):
+        if closable is not None:
+            try:
+                closable.close()
+            except Exception:
+                pass
+    _daemon_sock = None
+    _daemon_reader = None
+
+def _get_stats_daemon():
+    # Connect lazily and keep the socket open across polls, like the
+    # SMTP connection in email_monitor
+    global _daemon_sock, _daemon_reader
+    try:
+        if _daemon_sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(5.0)
+            sock.connect(_SOCKET_PATH)
+            _daemon_sock = sock
+            _daemon_reader = sock.makefile('rb')
+        _daemon_sock.sendall(b'STAT\n')
+        line = _daemon_reader.readline()
+        if not line:
+            raise ConnectionError("daemon closed the connection")
+        return _json_loads(line)
+    except Exception as e:
+        logger.warning(f"Stats daemon unavailable, falling back to local collection: {e}")
+        _close_daemon()
+        return None
+
+def _get_stats_subprocess():
+    try:
+        # Bytes stdout goes straight to the JSON parser (both orjson and
+        # json accept bytes), skipping a full decode pass over the blob
+        result = subprocess.run([sys.executable, 'cli.py', '--json'],
+                                capture_output=True, timeout=30)
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', 'replace')
+            logger.error(f"CLI command failed with return code {result.returncode}: {stderr}")
+            return None
+
+        try:
+            # orjson and json both raise a ValueError subclass here
+            return _json_loads(result.stdout)
+        except ValueError as e:
+            logger.error(f"Failed to parse JSON output from CLI: {e}")
+            return None
+    except Exception as e:
+        logger.error(f"Unexpected error running CLI: {e}")
+        return None
+
+def get_stats(include_processes=True, cpu_interval=None, max_age=None):
+    # Same {'stats': ...} layout the cli --json output uses. A cached
+    # full result also serves scalar-only callers, but not vice versa.
+    # cpu_interval is forwarded to the monitor; the shared monitor's
+    # first poll blocks for a real sample on its own.
+    # The cache exists for cross-consumer sharing, not to feed a poller
+    # its own last sample back: periodic loops pass their poll interval
+    # as max_age so two consecutive ticks never see the same dict.
+    global _stats_cache
+    ttl = STATS_TTL if max_age is None else min(STATS_TTL, max_age)
+    cached_at, cached, cached_full = _stats_cache
+    if cached is not None and time.monotonic() - cached_at < ttl \
+            and (cached_full or not include_processes):
+        return cached
+
+    result = _get_stats_daemon() if _SOCKET_PATH else None
+    if result is not None:
+        # Daemon replies always carry the full process lists
+        include_processes = True
+    elif _USE_SUBPROCESS:
+        result = _get_stats_subprocess()
+        if result is None:
+            return None
+        include_processes = True
+    else:
+        try:
+            result = {'stats': SHARED_MONITOR.get_system_stats(include_processes=include_processes,
+                                                               cpu_interval=cpu_interval)}
+        except Exception as e:
+            logger.error(f"Unexpected error collecting system stats: {e}")
+            return None
+
+    _stats_cache = (time.monotonic(), result, include_processes)
+    return result
@@ -1,8 +1,12 @@
-import subprocess
-import json
+import contextlib
+import functools
+import io
+import queue
+import signal
 import smtplib
 import os
 import argparse
+import threading
 import time
 from email.mime.text import MIMEText
 from datetime import datetime
@@ -10,136 +14,219 @@ from dotenv import load_dotenv
 import sys
 import logging
 
+import cli
+from automation_scripts import _common
+from automation_scripts._common import SHARED_MONITOR, extract_cpu_mem, get_stats as get_system_status, percent, positive_int
+
 load_dotenv()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def get_system_status():
-    try:
-        result = subprocess.run(['python', 'cli.py', '--json'], capture_output=True, text=True, timeout=30)
-        if result.returncode != 0:
-            logger.error(f"CLI command failed with return code {result.returncode}: {result.stderr}")
-            return None
-        
+_analyzer = None
+
+# Set from a SIGTERM handler so a shutdown request interrupts the
+# inter-check wait instead of sleeping it out (up to --time seconds)
+_stop = threading.Event()
+
+def _get_analyzer():
+    global _analyzer
+    if _analyzer is None:
         try:
-            return json.loads(result.stdout)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON output from CLI: {e}")
-            return None      
-    except Exception as e:
-        logger.error(f"Unexpected error running CLI: {e}")
-        return None
+            _analyzer = cli.AIAnalyzer()
+        except Exception as e:
+            logger.warning(f"AI analysis unavailable: {e}")
+            _analyzer = False
+    return _analyzer or None
+
+# Rendered reports are reused within the shared stats TTL, mirroring
+# the get_stats cache
+_report_cache = (0.0, None)
 
-def get_system_report():
+def get_system_report(stats=None):
+    # Callers that already hold a full stats dict pass it in so the
+    # report doesn't trigger a second process scan
+    global _report_cache
+    cached_at, cached = _report_cache
+    if cached is not None and time.monotonic() - cached_at < _common.STATS_TTL:
+        return cached
     try:
-        result = subprocess.run(['python', 'cli.py'], capture_output=True, text=True, timeout=30)
-        if result.returncode != 0:
-            logger.error(f"CLI command failed with return code {result.returncode}: {result.stderr}")
-            return f"CLI error: {result.stderr}"
-        return result.stdout      
+        if stats is None:
+            stats = SHARED_MONITOR.get_system_stats()
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            cli.print_system_stats(stats)
+            analyzer = _get_analyzer()
+            if analyzer:
+                try:
+                    recommendations = analyzer.ai_analysis(stats)
+                    if recommendations:
+                        cli.print_recommendations(recommendations)
+                except Exception as e:
+                    logger.warning(f"Skipping AI recommendations: {e}")
+        report = buffer.getvalue()
+        _report_cache = (time.monotonic(), report)
+        return report
     except Exception as e:
         logger.error(f"Unexpected error getting system report: {e}")
         return f"Error getting system report: {e}"
 
-def send_email(subject, body):
+# Delivery runs on a background thread over one long-lived SMTP
+# connection, so check_system never blocks on TLS/AUTH round-trips
+_email_queue = queue.Queue()
+_worker_started = threading.Event()
+_smtp_conn = None
+_SMTP_KEEPALIVE_SECS = 240
+
+def _get_smtp(username, password):
+    global _smtp_conn
+    if _smtp_conn is None:
+        server = smtplib.SMTP('smtp.gmail.com', 587)
+        server.starttls()
+        server.login(username, password)
+        _smtp_conn = server
+    return _smtp_conn
+
+def _close_smtp():
+    global _smtp_conn
+    if _smtp_conn is not None:
+        try:
+            _smtp_conn.quit()
+        except Exception:
+            pass
+        _smtp_conn = None
+
+_CRED_VARS = ('EMAIL_USERNAME', 'EMAIL_PASSWORD', 'EMAIL_TO')
+
+# Environment variables don't change mid-run; read them on the first
+# alert and serve every later one from the cache
+@functools.lru_cache(maxsize=1)
+def _email_creds():
+    return tuple(os.getenv(k) for k in _CRED_VARS)
+
+def _deliver_email(subject, body):
     try:
-        username = os.getenv('EMAIL_USERNAME')
-        password = os.getenv('EMAIL_PASSWORD')
-        to_email = os.getenv('EMAIL_TO')
-        
-        if not all([username, password, to_email]):
-            missing = []
-            if not username:
-                missing.append('EMAIL_USERNAME')
-            if not password:
-                missing.append('EMAIL_PASSWORD')
-            if not to_email:
-                missing.append('EMAIL_TO')
+        # Probe a reused connection before trusting it: Gmail drops idle
+        # sessions and a dead socket should cost us a reconnect, not the
+        # alert
+        if _smtp_conn is not None:
+            try:
+                _smtp_conn.noop()
+            except Exception:
+                _close_smtp()
+
+        username, password, to_email = _email_creds()
+        missing = [k for k, v in zip(_CRED_VARS, (username, password, to_email)) if not v]
+        if missing:
             logger.error(f"Missing email configuration: {', '.join(missing)}")
             return False
-        
+
         msg = MIMEText(body)
         msg['Subject'] = subject
         msg['From'] = username
         msg['To'] = to_email
-        
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(username, password)
-        server.send_message(msg)
-        server.quit()
+
+        try:
+            _get_smtp(username, password).send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server idled us out - reconnect once and retry
+            _close_smtp()
+            _get_smtp(username, password).send_message(msg)
         logger.info(f"Email sent successfully to {to_email}")
         return True
     except Exception as e:
         logger.error(f"Unexpected error sending email: {e}")
+        _close_smtp()
         return False
 
-def check_system(args):
-    try:
-        data = get_system_status()
-        if not data:
-            logger.warning("Could not retrieve system status")
-            return
-        
+def _smtp_worker():
+    while True:
         try:
-            cpu = data['stats']['cpu']['overall_percent']
-            memory = data['stats']['memory']['percent']
-        except KeyError as e:
-            logger.error(f"Missing expected data in system status: {e}")
-            return
-        except TypeError as e:
-            logger.error(f"Invalid data type in system status: {e}")
-            return
-        
+            subject, body = _email_queue.get(timeout=_SMTP_KEEPALIVE_SECS)
+        except queue.Empty:
+            # Keep the idle connection alive; drop it if the server is gone
+            if _smtp_conn is not None:
+                try:
+                    _smtp_conn.noop()
+                except Exception:
+                    _close_smtp()
+            continue
+        try:
+            _deliver_email(subject, body)
+        finally:
+            _email_queue.task_done()
+
+def send_email(subject, body):
+    if not _worker_started.is_set():
+        _worker_started.set()
+        threading.Thread(target=_smtp_worker, daemon=True).start()
+    _email_queue.put_nowait((subject, body))
+    return True
+
+def check_system_inline(stats, args):
+    try:
+        stats = stats or {}
+        cpu, memory = extract_cpu_mem(stats)
+
         logger.info(f"CPU: {cpu:.1f}%, Memory: {memory:.1f}%")
-        
-        if cpu > args.cpu_thresh or memory > args.mem_thresh:
-            subject = f"System Alert - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-            body = get_system_report()
-            
-            if send_email(subject, body):
-                logger.info("Alert email sent successfully!")
-            else:
-                logger.error("Failed to send alert email")            
+
+        if cpu <= args.cpu_thresh and memory <= args.mem_thresh:
+            return
+
+        subject = f"System Alert - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+        # Light stats lack the top_* process lists the report renders, so
+        # only reuse the dict when it came from a full collection
+        body = get_system_report(stats if 'top_cpu_processes' in stats else None)
+
+        if send_email(subject, body):
+            logger.info("Alert email queued for delivery")
+        else:
+            logger.error("Failed to queue alert email")
     except Exception as e:
         logger.error(f"Unexpected error in check_system: {e}")
 
+def check_system(args):
+    # Threshold checks only read the cpu/memory scalars, so skip the
+    # per-process scan; the full report is collected only on an alert.
+    # max_age keeps a fast monitor loop from checking the same cached
+    # sample twice.
+    data = get_system_status(include_processes=False, max_age=args.time)
+    if not data:
+        logger.warning("Could not retrieve system status")
+        return
+    check_system_inline(data.get('stats') or {}, args)
+
 def main():
     try:
         parser = argparse.ArgumentParser(description='System Monitor and Notification System')
-        parser.add_argument('--cpu-thresh', type=int, default=90, help='CPU Threshold to notify')
-        parser.add_argument('--mem-thresh', type=int, default=95, help='Memory Threshold to notify')
-        parser.add_argument('--time', type=int, default=300, help='Time interval to check system status in seconds')
+        parser.add_argument('--cpu-thresh', type=percent, default=90, help='CPU Threshold to notify')
+        parser.add_argument('--mem-thresh', type=percent, default=95, help='Memory Threshold to notify')
+        parser.add_argument('--time', type=positive_int, default=300, help='Time interval to check system status in seconds')
         parser.add_argument('--monitor', action='store_true', help='Run continuously')
-        
+
         args = parser.parse_args()
-        
-        # Validate arguments
-        if args.cpu_thresh < 0 or args.cpu_thresh > 100:
-            logger.error("CPU threshold must be between 0 and 100")
-            sys.exit(1)
-        if args.mem_thresh < 0 or args.mem_thresh > 100:
-            logger.error("Memory threshold must be between 0 and 100")
-            sys.exit(1)
-        if args.time < 1:
-            logger.error("Time interval must be at least 1 second")
-            sys.exit(1)
-        
+
         if args.monitor:
             logger.info("Starting continuous monitoring...")
+            signal.signal(signal.SIGTERM, lambda *_: _stop.set())
             try:
                 while True:
                     check_system(args)
-                    time.sleep(args.time)
+                    if _stop.wait(args.time):
+                        logger.info("Monitoring stopped by signal")
+                        break
+                _email_queue.join()
             except KeyboardInterrupt:
                 logger.info("Monitoring stopped by user")
+                _email_queue.join()
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 sys.exit(1)
         else:
-            check_system(args)    
+            check_system(args)
+            # One-shot runs must flush queued alerts before exiting
+            _email_queue.join()
     except Exception as e:
         logger.error(f"Fatal error in main: {e}")
         sys.exit(1)
@@ -0,0 +1,76 @@
+import argparse
+import signal
+import threading
+import sys
+import logging
+
+from automation_scripts import email_monitor, performance_logger
+from automation_scripts._common import SHARED_MONITOR, percent, positive_int
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Set from a SIGTERM handler so a shutdown request interrupts the
+# inter-tick wait instead of sleeping it out (up to --time seconds)
+_stop = threading.Event()
+
+def run_once(args):
+    # Collect stats once per tick and fan out to both consumers, instead
+    # of each script paying for its own process-table scan
+    try:
+        stats = SHARED_MONITOR.get_system_stats()
+    except Exception as e:
+        logger.error(f"Unexpected error collecting system stats: {e}")
+        return False
+
+    email_monitor.check_system_inline(stats, args)
+    return performance_logger.log_to_csv({'stats': stats}, args.output)
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description='Combined System Monitor, Notifier and Performance Logger')
+        parser.add_argument('--cpu-thresh', type=percent, default=90, help='CPU Threshold to notify')
+        parser.add_argument('--mem-thresh', type=percent, default=95, help='Memory Threshold to notify')
+        parser.add_argument('--output', default='system_performance.csv', help='Output filename')
+        parser.add_argument('--time', type=positive_int, default=300, help='Time interval to check system status in seconds')
+        parser.add_argument('--monitor', action='store_true', help='Run continuously')
+
+        args = parser.parse_args()
+
+        if not performance_logger.validate_filename(args.output):
+            logger.error(f"Invalid output filename: {args.output}")
+            sys.exit(1)
+
+        if args.monitor:
+            logger.info(f"Starting combined monitoring, logging to {args.output}...")
+            signal.signal(signal.SIGTERM, lambda *_: _stop.set())
+            try:
+                while True:
+                    run_once(args)
+                    # Slow ticks persist every sample instead of batching
+                    if args.time >= performance_logger._FLUSH_AFTER:
+                        performance_logger.flush_csv()
+                    if _stop.wait(args.time):
+                        logger.info("Monitoring stopped by signal")
+                        break
+                email_monitor._email_queue.join()
+            except KeyboardInterrupt:
+                logger.info("Monitoring stopped by user")
+                email_monitor._email_queue.join()
+            except Exception as e:
+                logger.error(f"Error in monitoring loop: {e}")
+                sys.exit(1)
+        else:
+            success = run_once(args)
+            email_monitor._email_queue.join()
+            if not success:
+                sys.exit(1)
+    except Exception as e:
+        logger.error(f"Fatal error in main: {e}")
+        sys.exit(1)
+    finally:
+        performance_logger.close_logs()
+
+if __name__ == '__main__':
+    main()
@@ -1,85 +1,163 @@
-import subprocess
-import json
+import atexit
 import csv
 import argparse
+import functools
+import io
+import os
+import queue
+import signal
+import threading
 import time
 from pathlib import Path
 import sys
 import logging
 
+# Optional: a .zst output filename streams rows through zstd, shrinking
+# long-running logs several-fold without changing the write path
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from automation_scripts._common import extract_cpu_mem, get_stats as get_system_data, positive_int
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def get_system_data():
-    try:
-        result = subprocess.run(['python', 'cli.py', '--json'], capture_output=True, text=True, timeout=30)
-        if result.returncode != 0:
-            logger.error(f"CLI command failed with return code {result.returncode}: {result.stderr}")
-            return None
-        
+# Set from a SIGTERM handler so a shutdown request interrupts the
+# inter-sample wait instead of sleeping it out (up to --time seconds)
+_stop = threading.Event()
+
+# Fixed column order so rows can be written positionally without the
+# per-call fieldname hashing DictWriter does
+_FIELDS = ('timestamp', 'cpu_percent', 'memory_percent', 'memory_used_gb',
+           'memory_total_gb', 'top_cpu_process', 'top_cpu_percent',
+           'top_memory_process', 'top_memory_percent')
+_INV_GIB = 1.0 / (1024 ** 3)
+
+# Long-lived file handles keyed by filename: the monitor loop appends a
+# row every tick and re-opening the file each time costs an
+# open/stat/close per sample for no benefit
+_open_logs = {}
+
+# Path() re-parses the string into parts on every construction; the
+# logger keeps hitting the same handful of filenames, so cache them
+@functools.lru_cache(maxsize=256)
+def _path(filename):
+    return Path(filename)
+
+def _get_writer(filename):
+    entry = _open_logs.get(filename)
+    if entry is None:
+        _path(filename).parent.mkdir(parents=True, exist_ok=True)
+        if filename.endswith('.zst'):
+            if zstandard is None:
+                raise RuntimeError("zstandard is not installed; cannot write compressed logs")
+            raw = open(filename, 'ab')
+            new_file = raw.tell() == 0
+            # threads=-1 offloads compression to worker threads so the
+            # monitor loop isn't paying for it inline
+            cctx = zstandard.ZstdCompressor(level=3, threads=-1)
+            f = io.TextIOWrapper(cctx.stream_writer(raw), encoding='utf-8', newline='')
+        else:
+            f = open(filename, 'a', newline='', encoding='utf-8', buffering=1 << 16)
+            new_file = f.tell() == 0
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(_FIELDS)
+        entry = (f, writer)
+        _open_logs[filename] = entry
+    return entry
+
+# Rows accumulate per filename and hit the disk in writerows batches;
+# shutdown paths (main's finally, atexit) flush whatever is pending.
+# Batching only pays off for high-frequency logging, so _FLUSH_AFTER
+# bounds how long any row can sit in memory: a partial batch older
+# than that is flushed, and loops ticking slower than it persist every
+# sample immediately.
+_BATCH_SIZE = 32
+_FLUSH_AFTER = 5.0
+_pending = {}
+_pending_since = {}
+
+def flush_csv():
+    for filename, rows in _pending.items():
+        if not rows:
+            continue
+        f, writer = _get_writer(filename)
+        writer.writerows(rows)
+        rows.clear()
+        f.flush()
+
+def close_logs():
+    flush_csv()
+    for f, _ in _open_logs.values():
         try:
-            return json.loads(result.stdout)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON output from CLI: {e}")
-            return None    
-    except Exception as e:
-        logger.error(f"Unexpected error running CLI: {e}")
-        return None
+            f.close()
+        except Exception as e:
+            logger.warning(f"Error closing log file: {e}")
+    _open_logs.clear()
+
+# Callers that use log_to_csv directly (without going through main's
+# try/finally) still get their handles closed on interpreter exit
+atexit.register(close_logs)
 
 def log_to_csv(data, filename='system_performance.csv'):
     try:
         if not data or 'stats' not in data:
             logger.error("Invalid data structure provided to log_to_csv")
             return False
-            
+
         stats = data['stats']
-        
-        row = {
-            'timestamp': stats.get('timestamp', ''),
-            'cpu_percent': stats.get('cpu', {}).get('overall_percent', 0),
-            'memory_percent': stats.get('memory', {}).get('percent', 0),
-            'memory_used_gb': stats.get('memory', {}).get('used', 0) / (1024**3),
-            'memory_total_gb': stats.get('memory', {}).get('total', 0) / (1024**3),
-            'top_cpu_process': '',
-            'top_cpu_percent': 0,
-            'top_memory_process': '',
-            'top_memory_percent': 0
-        }
-        
+        memory = stats.get('memory', {})
+
         # Safely extract top process information
+        top_cpu_process, top_cpu_percent = '', 0
         top_cpu_processes = stats.get('top_cpu_processes', [])
-        if top_cpu_processes and len(top_cpu_processes) > 0:
+        if top_cpu_processes:
             top_cpu = top_cpu_processes[0]
-            row['top_cpu_process'] = top_cpu.get('name', '')
-            row['top_cpu_percent'] = top_cpu.get('cpu_percent') or 0
-        
+            top_cpu_process = top_cpu.get('name', '')
+            top_cpu_percent = top_cpu.get('cpu_percent') or 0
+
+        top_memory_process, top_memory_percent = '', 0
         top_memory_processes = stats.get('top_memory_processes', [])
-        if top_memory_processes and len(top_memory_processes) > 0:
+        if top_memory_processes:
             top_memory = top_memory_processes[0]
-            row['top_memory_process'] = top_memory.get('name', '')
-            row['top_memory_percent'] = top_memory.get('memory_percent') or 0       
-        
-        # Check if file exists and is writable
-        file_path = Path(filename)
-        file_exists = file_path.exists()
-        
-        # Create directory if it doesn't exist
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(filename, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=row.keys())
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(row)
-        return True      
+            top_memory_process = top_memory.get('name', '')
+            top_memory_percent = top_memory.get('memory_percent') or 0
+
+        cpu_percent, memory_percent = extract_cpu_mem(stats)
+        row = [
+            stats.get('timestamp', ''),
+            cpu_percent,
+            memory_percent,
+            memory.get('used', 0) * _INV_GIB,
+            memory.get('total', 0) * _INV_GIB,
+            top_cpu_process,
+            top_cpu_percent,
+            top_memory_process,
+            top_memory_percent
+        ]
+
+        rows = _pending.setdefault(filename, [])
+        if not rows:
+            _pending_since[filename] = time.monotonic()
+        rows.append(row)
+        if (len(rows) >= _BATCH_SIZE
+                or time.monotonic() - _pending_since[filename] >= _FLUSH_AFTER):
+            f, writer = _get_writer(filename)
+            writer.writerows(rows)
+            rows.clear()
+            f.flush()
+        return True
     except Exception as e:
         logger.error(f"Unexpected error in log_to_csv: {e}")
         return False
 
-def log_data(output_filename):
+def log_data(output_filename, max_age=None):
     try:
-        data = get_system_data()
+        data = get_system_data(max_age=max_age)
         if not data:
             logger.warning("Could not retrieve system data")
             return False
@@ -94,37 +172,82 @@ def log_data(output_filename):
         logger.error(f"Unexpected error in log_data: {e}")
         return False
 
+# Directories we've already created - validate_filename runs on every
+# log path and shouldn't pay a mkdir syscall per call
+_ensured_dirs = set()
+
 def validate_filename(filename):
     try:
         # Check if filename is valid
         if not filename or len(filename.strip()) == 0:
             return False
-        
-        # Check for invalid characters
-        invalid_chars = '<>:"/\\|?*'
-        if any(char in filename for char in invalid_chars):
+
+        # Check for invalid characters in the filename itself
+        name = os.path.basename(filename)
+        invalid_chars = '<>:"|?*'
+        if not name or any(char in name for char in invalid_chars):
             return False
-        
-        # Try to create the path to check if it's valid
-        Path(filename).parent.mkdir(parents=True, exist_ok=True)
-        return True     
+
+        # Reject compressed output up front when the optional dependency
+        # is missing, instead of failing on every write
+        if filename.endswith('.zst') and zstandard is None:
+            return False
+
+        # Ensure the parent directory exists, once per directory
+        dirname = os.path.dirname(filename) or '.'
+        if dirname not in _ensured_dirs:
+            os.makedirs(dirname, exist_ok=True)
+            _ensured_dirs.add(dirname)
+        return True
     except Exception:
         return False
 
+# --monitor --async: a producer thread collects stats while this
+# thread writes, so a slow write no longer delays the next sample.
+# Without the flag, collection and writing run serially on one thread.
+_STOP_SENTINEL = object()
+
+def _run_async_monitor(args, output_filename):
+    samples = queue.SimpleQueue()
+
+    def _producer():
+        while True:
+            samples.put(get_system_data(max_age=args.time))
+            if _stop.wait(args.time):
+                samples.put(_STOP_SENTINEL)
+                break
+
+    threading.Thread(target=_producer, daemon=True).start()
+
+    consecutive_failures = 0
+    max_failures = 5
+    while True:
+        data = samples.get()
+        if data is _STOP_SENTINEL:
+            logger.info("Monitoring stopped by signal")
+            break
+
+        if data and log_to_csv(data, output_filename):
+            consecutive_failures = 0
+            if args.time >= _FLUSH_AFTER:
+                flush_csv()
+        else:
+            consecutive_failures += 1
+            if consecutive_failures >= max_failures:
+                logger.error(f"Too many consecutive failures ({max_failures}). Stopping monitoring.")
+                sys.exit(1)
+
 def main():
     try:
         parser = argparse.ArgumentParser(description='System Performance Logger')
         parser.add_argument('--output', help='Output filename')
-        parser.add_argument('--time', type=int, default=300, help='Time interval to check system status in seconds')
+        parser.add_argument('--time', type=positive_int, default=300, help='Time interval to check system status in seconds')
         parser.add_argument('--monitor', action='store_true', help='Run continuously')
-        
+        parser.add_argument('--async', dest='use_async', action='store_true',
+                            help='Collect stats on a background thread while writing')
+
         args = parser.parse_args()
-        
-        # Validate arguments
-        if args.time < 1:
-            logger.error("Time interval must be at least 1 second")
-            sys.exit(1)
-        
+
         output_filename = args.output if args.output else 'system_performance.csv'
         
         # Validate output filename
@@ -134,22 +257,39 @@ def main():
 
         if args.monitor:
             logger.info(f"Starting continuous monitoring, logging to {output_filename}...")
+            signal.signal(signal.SIGTERM, lambda *_: _stop.set())
+
+            if args.use_async:
+                try:
+                    _run_async_monitor(args, output_filename)
+                except KeyboardInterrupt:
+                    logger.info("Monitoring stopped by user")
+                return
+
             consecutive_failures = 0
             max_failures = 5
-            
+
             try:
                 while True:
-                    success = log_data(output_filename)
-                    
+                    # Capping the cache age at the poll interval keeps a
+                    # fast loop from re-logging its own cached sample
+                    success = log_data(output_filename, max_age=args.time)
+
                     if success:
                         consecutive_failures = 0
+                        # Slow ticks can never fill a batch promptly, so
+                        # persist each sample as it arrives
+                        if args.time >= _FLUSH_AFTER:
+                            flush_csv()
                     else:
                         consecutive_failures += 1
                         if consecutive_failures >= max_failures:
                             logger.error(f"Too many consecutive failures ({max_failures}). Stopping monitoring.")
                             sys.exit(1)
-                    
-                    time.sleep(args.time)        
+
+                    if _stop.wait(args.time):
+                        logger.info("Monitoring stopped by signal")
+                        break
             except KeyboardInterrupt:
                 logger.info("Monitoring stopped by user")
             except Exception as e:
@@ -162,6 +302,8 @@ def main():
     except Exception as e:
         logger.error(f"Fatal error in main: {e}")
         sys.exit(1)
+    finally:
+        close_logs()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
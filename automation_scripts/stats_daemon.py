@@ -0,0 +1,90 @@
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import sys
+
+from automation_scripts._common import SHARED_MONITOR
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# One resident process keeps the cpu_percent baseline and Process cache
+# warm for every consumer on the box. Clients connect once, send
+# b'STAT\n' per poll and read back one compact JSON line, so a poll
+# costs a round-trip on a local socket instead of a fork+exec.
+DEFAULT_SOCKET = '/tmp/clistats.sock'
+
+# Set from a SIGTERM handler so a shutdown request interrupts the
+# accept loop instead of waiting for the next client
+_stop = threading.Event()
+
+# Client handlers run on their own threads but the shared monitor is
+# not thread-safe: concurrent collections race on the Process cache and
+# reset each other's cpu_percent delta baselines
+_stats_lock = threading.Lock()
+
+def _stats_line():
+    with _stats_lock:
+        stats = SHARED_MONITOR.get_system_stats()
+    return json.dumps({'stats': stats}, separators=(',', ':'), default=str).encode() + b'\n'
+
+def handle_client(conn):
+    try:
+        with conn, conn.makefile('rb') as reader:
+            for line in reader:
+                if line.strip() != b'STAT':
+                    continue
+                conn.sendall(_stats_line())
+    except Exception as e:
+        logger.warning(f"Client connection error: {e}")
+
+def listen_forever(socket_path=DEFAULT_SOCKET):
+    # A stale socket file from a previous run would make bind() fail
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(socket_path)
+        server.listen()
+        # Wake up periodically so a stop request isn't stuck behind accept()
+        server.settimeout(1.0)
+        logger.info(f"Stats daemon listening on {socket_path}")
+        while not _stop.is_set():
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                continue
+            threading.Thread(target=handle_client, args=(conn,), daemon=True).start()
+    finally:
+        server.close()
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+
+def main():
+    try:
+        parser = argparse.ArgumentParser(description='Long-lived system stats daemon')
+        parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket path to listen on')
+
+        args = parser.parse_args()
+
+        signal.signal(signal.SIGTERM, lambda *_: _stop.set())
+        try:
+            listen_forever(args.socket)
+        except KeyboardInterrupt:
+            logger.info("Stats daemon stopped by user")
+    except Exception as e:
+        logger.error(f"Fatal error in main: {e}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -13,11 +13,16 @@ setup(
         "openai>=1.82.0",
         "python-dotenv>=1.1.0",
     ],
+    extras_require={
+        "zstd": ["zstandard>=0.21"],
+    },
     entry_points={
         "console_scripts": [
             "system-advisor=cli:main",
             "email-monitor=automation_scripts.email_monitor:main",
             "performance-logger=automation_scripts.performance_logger:main",
+            "system-monitor-all=automation_scripts.monitor_all:main",
+            "system-stats-daemon=automation_scripts.stats_daemon:main",
         ],
     },
     python_requires=">=3.9",
@@ -0,0 +1,12 @@
+import pytest
+from automation_scripts import _common, email_monitor, performance_logger
+
+@pytest.fixture(autouse=True)
+def fresh_stats_cache():
+    _common.clear_stats_cache()
+    email_monitor._report_cache = (0.0, None)
+    yield
+    _common.clear_stats_cache()
+    email_monitor._report_cache = (0.0, None)
+    performance_logger._pending.clear()
+    performance_logger.close_logs()
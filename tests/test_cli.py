@@ -51,14 +51,15 @@ def test_get_system_stats_success():
     monitor = cli.SystemMonitor()
     with patch("psutil.cpu_percent", side_effect=[70.0, [70.0, 60.0]]), \
          patch("psutil.virtual_memory") as mock_memory, \
-         patch("psutil.process_iter") as mock_iter:
+         patch("psutil.pids", return_value=[1]), \
+         patch("psutil.Process") as mock_process:
 
         mock_memory.return_value = Mock(total=8192, available=4096, percent=50.0, used=4096)
-        mock_proc = Mock()
-        mock_proc.info = {
-            "pid": 1, "name": "test", "cpu_percent": 10.0, "memory_percent": 5.0, "memory_info": Mock(rss=1024)
-        }
-        mock_iter.return_value = [mock_proc]
+        mock_proc = mock_process.return_value
+        mock_proc.name.return_value = "test"
+        mock_proc.cpu_percent.return_value = 10.0
+        mock_proc.memory_percent.return_value = 5.0
+        mock_proc.memory_info.return_value = Mock(rss=1024)
 
         stats = monitor.get_system_stats()
         assert "cpu" in stats
@@ -66,6 +67,46 @@ def test_get_system_stats_success():
         assert isinstance(stats["top_cpu_processes"], list)
 
 
+def test_get_system_stats_light_skips_process_scan():
+    monitor = cli.SystemMonitor()
+    with patch("psutil.cpu_percent", side_effect=[70.0, [70.0, 60.0]]), \
+         patch("psutil.virtual_memory") as mock_memory, \
+         patch("psutil.pids") as mock_pids:
+
+        mock_memory.return_value = Mock(total=8192, available=4096, percent=50.0, used=4096)
+
+        stats = monitor.get_system_stats(include_processes=False)
+        assert "cpu" in stats
+        assert "memory" in stats
+        assert "top_cpu_processes" not in stats
+        mock_pids.assert_not_called()
+
+
+def test_get_system_stats_first_poll_takes_real_sample():
+    monitor = cli.SystemMonitor()
+    with patch("psutil.cpu_percent", side_effect=[70.0, [70.0, 60.0], 71.0, [71.0, 61.0]]) as mock_cpu, \
+         patch("psutil.virtual_memory") as mock_memory:
+
+        mock_memory.return_value = Mock(total=8192, available=4096, percent=50.0, used=4096)
+
+        monitor.get_system_stats(include_processes=False)
+        monitor.get_system_stats(include_processes=False)
+        # First poll blocks for a real window, later polls are deltas
+        assert mock_cpu.call_args_list[0].kwargs["interval"] == cli._FIRST_SAMPLE_INTERVAL
+        assert mock_cpu.call_args_list[2].kwargs["interval"] is None
+
+
+def test_get_system_stats_oneshot_takes_real_sample():
+    monitor = cli.SystemMonitor()
+    with patch("psutil.cpu_percent", side_effect=[70.0, [70.0, 60.0]]) as mock_cpu, \
+         patch("psutil.virtual_memory") as mock_memory:
+
+        mock_memory.return_value = Mock(total=8192, available=4096, percent=50.0, used=4096)
+
+        monitor.get_system_stats(include_processes=False, cpu_interval=0.5)
+        assert mock_cpu.call_args_list[0].kwargs["interval"] == 0.5
+
+
 def test_ai_analysis_valid_response():
     analyzer = cli.AIAnalyzer()
     analyzer.client = Mock()
@@ -82,8 +123,8 @@ def test_ai_analysis_valid_response():
         """))
     ]
     stats = {
-        "cpu": {"overall_percent": 70},
-        "memory": {"percent": 40},
+        "cpu": {"overall_percent": 95},
+        "memory": {"percent": 90},
         "top_cpu_processes": [],
         "top_memory_processes": [],
     }
@@ -92,6 +133,21 @@ def test_ai_analysis_valid_response():
     assert result[0]["type"] == "performance"
 
 
+def test_ai_analysis_skips_llm_below_thresholds():
+    analyzer = cli.AIAnalyzer()
+    analyzer.client = Mock()
+    stats = {
+        "cpu": {"overall_percent": 10},
+        "memory": {"percent": 20},
+        "top_cpu_processes": [],
+        "top_memory_processes": [],
+    }
+    result = analyzer.ai_analysis(stats)
+    assert isinstance(result, list)
+    assert result[0]["severity"] == "info"
+    analyzer.client.chat.completions.create.assert_not_called()
+
+
 def test_ai_analysis_malformed_response():
     analyzer = cli.AIAnalyzer()
     analyzer.client = Mock()
@@ -0,0 +1,82 @@
+import pytest
+from dataclasses import dataclass
+from unittest.mock import patch
+from automation_scripts import _common
+
+# Cheaper stand-in than Mock(returncode=..., stdout=...): plain
+# attribute access, no call-tracking machinery
+@dataclass
+class FakeProc:
+    returncode: int = 0
+    stdout: bytes = b""
+    stderr: bytes = b""
+
+def test_extract_cpu_mem():
+    stats = {"cpu": {"overall_percent": 70.5}, "memory": {"percent": 50.2}}
+    assert _common.extract_cpu_mem(stats) == (70.5, 50.2)
+
+def test_extract_cpu_mem_missing_keys():
+    assert _common.extract_cpu_mem({}) == (0.0, 0.0)
+    assert _common.extract_cpu_mem(None) == (0.0, 0.0)
+    assert _common.extract_cpu_mem({"cpu": None, "memory": None}) == (0.0, 0.0)
+
+def test_get_stats_reuses_result_within_ttl():
+    mock_stats = {"cpu": {"overall_percent": 70}, "memory": {"percent": 50}}
+    with patch.object(_common.SHARED_MONITOR, "get_system_stats", return_value=mock_stats) as mock_get:
+        first = _common.get_stats()
+        second = _common.get_stats()
+        assert first is second
+        mock_get.assert_called_once()
+
+def test_get_stats_ttl_zero_disables_cache(monkeypatch):
+    monkeypatch.setattr(_common, "STATS_TTL", 0)
+    mock_stats = {"cpu": {"overall_percent": 70}, "memory": {"percent": 50}}
+    with patch.object(_common.SHARED_MONITOR, "get_system_stats", return_value=mock_stats) as mock_get:
+        _common.get_stats()
+        _common.get_stats()
+        assert mock_get.call_count == 2
+
+def test_get_stats_max_age_caps_cache_reuse():
+    mock_stats = {"cpu": {"overall_percent": 70}, "memory": {"percent": 50}}
+    with patch.object(_common.SHARED_MONITOR, "get_system_stats", return_value=mock_stats) as mock_get:
+        _common.get_stats()
+        # A poller asking for a sample no older than its tick spacing
+        # must not be fed its own cached result back
+        _common.get_stats(max_age=0)
+        assert mock_get.call_count == 2
+
+def test_get_stats_full_cache_serves_light_request():
+    mock_stats = {"cpu": {"overall_percent": 70}, "memory": {"percent": 50}}
+    with patch.object(_common.SHARED_MONITOR, "get_system_stats", return_value=mock_stats) as mock_get:
+        full = _common.get_stats()
+        light = _common.get_stats(include_processes=False)
+        assert full is light
+        mock_get.assert_called_once()
+
+def test_get_stats_light_cache_not_served_for_full_request():
+    mock_stats = {"cpu": {"overall_percent": 70}, "memory": {"percent": 50}}
+    with patch.object(_common.SHARED_MONITOR, "get_system_stats", return_value=mock_stats) as mock_get:
+        _common.get_stats(include_processes=False)
+        _common.get_stats()
+        assert mock_get.call_count == 2
+        assert mock_get.call_args_list[1].kwargs["include_processes"] is True
+
+def test_get_stats_subprocess_fallback(monkeypatch):
+    monkeypatch.setattr(_common, "_USE_SUBPROCESS", True)
+    mock_output = '{"stats": {"cpu": {"overall_percent": 80}, "memory": {"percent": 50}}}'
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = FakeProc(stdout=mock_output.encode())
+        result = _common.get_stats()
+        assert result["stats"]["cpu"]["overall_percent"] == 80
+
+def test_get_stats_subprocess_fallback_bad_json(monkeypatch):
+    monkeypatch.setattr(_common, "_USE_SUBPROCESS", True)
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = FakeProc(stdout=b"not json")
+        assert _common.get_stats() is None
+
+def test_get_stats_failure_not_cached():
+    mock_stats = {"cpu": {"overall_percent": 70}, "memory": {"percent": 50}}
+    with patch.object(_common.SHARED_MONITOR, "get_system_stats", side_effect=[Exception("Boom"), mock_stats]):
+        assert _common.get_stats() is None
+        assert _common.get_stats() == {"stats": mock_stats}
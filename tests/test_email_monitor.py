@@ -1,74 +1,115 @@
 import pytest
+from types import SimpleNamespace
 from unittest.mock import patch, Mock
 from automation_scripts import email_monitor
 
+@pytest.fixture(autouse=True)
+def fresh_smtp_state():
+    email_monitor._smtp_conn = None
+    email_monitor._email_creds.cache_clear()
+    yield
+    email_monitor._smtp_conn = None
+    email_monitor._email_creds.cache_clear()
+
 def test_get_system_status_success():
-    mock_output = '{"stats": {"cpu": {"overall_percent": 80}, "memory": {"percent": 50}}}'
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value = Mock(returncode=0, stdout=mock_output)
+    mock_stats = {"cpu": {"overall_percent": 80}, "memory": {"percent": 50}}
+    with patch.object(email_monitor.SHARED_MONITOR, "get_system_stats", return_value=mock_stats):
         result = email_monitor.get_system_status()
         assert isinstance(result, dict)
-        assert "stats" in result
-
-def test_get_system_status_failure_returncode():
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value = Mock(returncode=1, stderr="Error")
-        result = email_monitor.get_system_status()
-        assert result is None
-
-def test_get_system_status_invalid_json():
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value = Mock(returncode=0, stdout="not json")
-        result = email_monitor.get_system_status()
-        assert result is None
+        assert result["stats"] == mock_stats
 
 def test_get_system_status_exception():
-    with patch("subprocess.run", side_effect=Exception("Boom")):
+    with patch.object(email_monitor.SHARED_MONITOR, "get_system_stats", side_effect=Exception("Boom")):
         result = email_monitor.get_system_status()
         assert result is None
 
 def test_get_system_report_success():
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value = Mock(returncode=0, stdout="Report OK")
+    mock_stats = {
+        "timestamp": "2025-05-26T19:00:00",
+        "cpu": {"overall_percent": 80.0},
+        "memory": {"percent": 50.0, "used": 4096, "total": 8192},
+        "top_cpu_processes": [],
+        "top_memory_processes": [],
+    }
+    with patch.object(email_monitor.SHARED_MONITOR, "get_system_stats", return_value=mock_stats), \
+         patch("automation_scripts.email_monitor._get_analyzer", return_value=None):
         result = email_monitor.get_system_report()
-        assert "Report OK" in result
+        assert "SYSTEM MONITOR" in result
 
-def test_get_system_report_error_returncode():
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value = Mock(returncode=1, stderr="Failure")
-        result = email_monitor.get_system_report()
-        assert "CLI error" in result
+def test_get_system_report_reuses_given_stats():
+    stats = {
+        "timestamp": "2025-05-26T19:00:00",
+        "cpu": {"overall_percent": 80.0},
+        "memory": {"percent": 50.0, "used": 4096, "total": 8192},
+        "top_cpu_processes": [],
+        "top_memory_processes": [],
+    }
+    with patch.object(email_monitor.SHARED_MONITOR, "get_system_stats") as mock_get, \
+         patch("automation_scripts.email_monitor._get_analyzer", return_value=None):
+        result = email_monitor.get_system_report(stats)
+        assert "SYSTEM MONITOR" in result
+        mock_get.assert_not_called()
 
 def test_get_system_report_exception():
-    with patch("subprocess.run", side_effect=Exception("Boom")):
+    with patch.object(email_monitor.SHARED_MONITOR, "get_system_stats", side_effect=Exception("Boom")):
         result = email_monitor.get_system_report()
         assert "Error getting system report" in result
 
-def test_send_email_success():
+def test_deliver_email_success():
     with patch.dict("os.environ", {
         "EMAIL_USERNAME": "user@example.com",
         "EMAIL_PASSWORD": "pass",
         "EMAIL_TO": "to@example.com"
     }), patch("smtplib.SMTP") as mock_smtp:
         instance = mock_smtp.return_value
-        result = email_monitor.send_email("subject", "body")
+        result = email_monitor._deliver_email("subject", "body")
         assert result is True
         instance.send_message.assert_called_once()
 
-def test_send_email_missing_env():
+def test_deliver_email_reuses_connection():
+    with patch.dict("os.environ", {
+        "EMAIL_USERNAME": "user@example.com",
+        "EMAIL_PASSWORD": "pass",
+        "EMAIL_TO": "to@example.com"
+    }), patch("smtplib.SMTP") as mock_smtp:
+        assert email_monitor._deliver_email("first", "body") is True
+        assert email_monitor._deliver_email("second", "body") is True
+        mock_smtp.assert_called_once()
+        assert mock_smtp.return_value.send_message.call_count == 2
+
+def test_deliver_email_reconnects_when_stale():
+    stale = Mock()
+    stale.noop.side_effect = Exception("disconnected")
+    email_monitor._smtp_conn = stale
+    with patch.dict("os.environ", {
+        "EMAIL_USERNAME": "user@example.com",
+        "EMAIL_PASSWORD": "pass",
+        "EMAIL_TO": "to@example.com"
+    }), patch("smtplib.SMTP") as mock_smtp:
+        assert email_monitor._deliver_email("subject", "body") is True
+        mock_smtp.return_value.send_message.assert_called_once()
+        stale.send_message.assert_not_called()
+
+def test_deliver_email_missing_env():
     with patch.dict("os.environ", {}, clear=True):
-        result = email_monitor.send_email("subject", "body")
+        result = email_monitor._deliver_email("subject", "body")
         assert result is False
 
-def test_send_email_exception():
+def test_deliver_email_exception():
     with patch.dict("os.environ", {
         "EMAIL_USERNAME": "user@example.com",
         "EMAIL_PASSWORD": "pass",
         "EMAIL_TO": "to@example.com"
     }), patch("smtplib.SMTP", side_effect=Exception("fail")):
-        result = email_monitor.send_email("subject", "body")
+        result = email_monitor._deliver_email("subject", "body")
         assert result is False
 
+def test_send_email_queues_for_background_delivery():
+    with patch("automation_scripts.email_monitor._deliver_email", return_value=True) as mock_deliver:
+        assert email_monitor.send_email("subject", "body") is True
+        email_monitor._email_queue.join()
+        mock_deliver.assert_called_with("subject", "body")
+
 def test_check_system_triggers_email():
     mock_data = {
         "stats": {
@@ -76,19 +117,19 @@ def test_check_system_triggers_email():
             "memory": {"percent": 96}
         }
     }
-    args = Mock(cpu_thresh=90, mem_thresh=90)
+    args = SimpleNamespace(cpu_thresh=90, mem_thresh=90, time=300)
     with patch("automation_scripts.email_monitor.get_system_status", return_value=mock_data), \
          patch("automation_scripts.email_monitor.get_system_report", return_value="report..."), \
          patch("automation_scripts.email_monitor.send_email", return_value=True):
         email_monitor.check_system(args)
 
 def test_check_system_no_data():
-    args = Mock(cpu_thresh=90, mem_thresh=90)
+    args = SimpleNamespace(cpu_thresh=90, mem_thresh=90, time=300)
     with patch("automation_scripts.email_monitor.get_system_status", return_value=None):
         email_monitor.check_system(args)
 
 def test_check_system_invalid_keys():
-    args = Mock(cpu_thresh=90, mem_thresh=90)
+    args = SimpleNamespace(cpu_thresh=90, mem_thresh=90, time=300)
     bad_data = {"stats": {}}
     with patch("automation_scripts.email_monitor.get_system_status", return_value=bad_data):
         email_monitor.check_system(args)
@@ -99,6 +140,16 @@ def test_email_monitor_main_single_run(monkeypatch):
         email_monitor.main()
         mock_check.assert_called_once()
 
+def test_email_monitor_main_monitor_stops_on_event(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["prog", "--monitor", "--time", "1"])
+    email_monitor._stop.set()
+    try:
+        with patch("automation_scripts.email_monitor.check_system") as mock_check:
+            email_monitor.main()
+            mock_check.assert_called_once()
+    finally:
+        email_monitor._stop.clear()
+
 def test_email_monitor_main_bad_thresh(monkeypatch):
     monkeypatch.setattr("sys.argv", ["prog", "--cpu-thresh", "-5"])
     with pytest.raises(SystemExit):
@@ -0,0 +1,31 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, Mock
+from automation_scripts import monitor_all
+from automation_scripts._common import SHARED_MONITOR
+
+def test_run_once_fans_out_to_both_consumers(tmp_path):
+    args = SimpleNamespace(cpu_thresh=90, mem_thresh=95, output=str(tmp_path / "out.csv"))
+    stats = {"cpu": {"overall_percent": 10}, "memory": {"percent": 20}}
+    with patch.object(SHARED_MONITOR, "get_system_stats", return_value=stats), \
+         patch("automation_scripts.monitor_all.email_monitor.check_system_inline") as mock_check, \
+         patch("automation_scripts.monitor_all.performance_logger.log_to_csv", return_value=True) as mock_log:
+        assert monitor_all.run_once(args) is True
+        mock_check.assert_called_once_with(stats, args)
+        mock_log.assert_called_once_with({"stats": stats}, args.output)
+
+def test_run_once_collection_failure(tmp_path):
+    args = SimpleNamespace(cpu_thresh=90, mem_thresh=95, output=str(tmp_path / "out.csv"))
+    with patch.object(SHARED_MONITOR, "get_system_stats", side_effect=Exception("Boom")):
+        assert monitor_all.run_once(args) is False
+
+def test_monitor_all_main_single_run(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["prog", "--output", "test.csv"])
+    with patch("automation_scripts.monitor_all.run_once", return_value=True) as mock_run:
+        monitor_all.main()
+        mock_run.assert_called_once()
+
+def test_monitor_all_main_bad_thresh(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["prog", "--cpu-thresh", "-5"])
+    with pytest.raises(SystemExit):
+        monitor_all.main()
@@ -1,6 +1,8 @@
 import pytest
+from types import SimpleNamespace
 from unittest.mock import patch, Mock
 import automation_scripts.performance_logger as pl
+from automation_scripts._common import SHARED_MONITOR
 from pathlib import Path
 
 @pytest.fixture
@@ -20,30 +22,68 @@ def mock_data():
     }
 
 def test_get_system_data_success():
-    mock_json = '{"stats": {"cpu": {"overall_percent": 70}, "memory": {"percent": 50}}}'
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value = Mock(returncode=0, stdout=mock_json)
+    mock_stats = {"cpu": {"overall_percent": 70}, "memory": {"percent": 50}}
+    with patch.object(SHARED_MONITOR, "get_system_stats", return_value=mock_stats):
         result = pl.get_system_data()
         assert isinstance(result, dict)
-        assert "stats" in result
+        assert result["stats"] == mock_stats
 
-def test_get_system_data_cli_error():
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value = Mock(returncode=1, stderr="fail")
-        assert pl.get_system_data() is None
-
-def test_get_system_data_json_error():
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value = Mock(returncode=0, stdout="bad json")
+def test_get_system_data_exception():
+    with patch.object(SHARED_MONITOR, "get_system_stats", side_effect=Exception("Boom")):
         assert pl.get_system_data() is None
 
 def test_log_to_csv_valid_data(mock_data, tmp_path):
     csv_file = tmp_path / "log.csv"
     assert pl.log_to_csv(mock_data, str(csv_file)) is True
+    pl.flush_csv()
     content = csv_file.read_text()
     assert "timestamp" in content
     assert "cpu_percent" in content
 
+def test_log_to_csv_batches_until_flush(mock_data, tmp_path, monkeypatch):
+    monkeypatch.setattr(pl, "_BATCH_SIZE", 2)
+    csv_file = tmp_path / "log.csv"
+    assert pl.log_to_csv(mock_data, str(csv_file)) is True
+    assert not csv_file.exists()
+    assert pl.log_to_csv(mock_data, str(csv_file)) is True
+    content = csv_file.read_text()
+    assert content.count("proc1") == 2
+
+def test_log_to_csv_zstd_roundtrip(mock_data, tmp_path):
+    zstd = pytest.importorskip("zstandard")
+    csv_file = tmp_path / "log.csv.zst"
+    assert pl.log_to_csv(mock_data, str(csv_file)) is True
+    # Closing ends the zstd frame so the file is decodable
+    pl.close_logs()
+    with open(csv_file, "rb") as fh:
+        content = zstd.ZstdDecompressor().stream_reader(fh).read().decode()
+    assert content.splitlines()[0].startswith("timestamp")
+    assert "proc1" in content
+
+def test_validate_filename_zstd_requires_dependency(monkeypatch):
+    monkeypatch.setattr(pl, "zstandard", None)
+    assert pl.validate_filename("log.csv.zst") is False
+
+def test_log_to_csv_flushes_stale_partial_batch(mock_data, tmp_path, monkeypatch):
+    monkeypatch.setattr(pl, "_FLUSH_AFTER", 0.0)
+    csv_file = tmp_path / "log.csv"
+    assert pl.log_to_csv(mock_data, str(csv_file)) is True
+    # Age-based flush hits the disk without filling the batch
+    assert "proc1" in csv_file.read_text()
+
+def test_perf_logger_main_slow_monitor_flushes_each_tick(monkeypatch, tmp_path):
+    output = str(tmp_path / "out.csv")
+    monkeypatch.setattr("sys.argv", ["prog", "--monitor", "--time", "300", "--output", output])
+    pl._stop.set()
+    try:
+        with patch("automation_scripts.performance_logger.log_data", return_value=True), \
+             patch("automation_scripts.performance_logger.close_logs"), \
+             patch("automation_scripts.performance_logger.flush_csv") as mock_flush:
+            pl.main()
+            mock_flush.assert_called_once()
+    finally:
+        pl._stop.clear()
+
 def test_log_to_csv_invalid_data():
     assert pl.log_to_csv({}, "dummy.csv") is False
 
@@ -59,16 +99,37 @@ def test_log_data_failure(tmp_path):
         assert pl.log_data(str(tmp_path / "out.csv")) is False
 
 
-def test_validate_filename_valid(tmp_path):
+def test_validate_filename_valid_path(tmp_path):
     valid_file = tmp_path / "system_performance.csv"
     valid_file.parent.mkdir(parents=True, exist_ok=True)
     assert pl.validate_filename(str(valid_file)) is True
 
+def test_path_helper_caches_instances():
+    assert pl._path("some/log.csv") is pl._path("some/log.csv")
+
 def test_validate_filename_valid():
-    with patch("pathlib.Path.mkdir") as mock_mkdir:
-        mock_mkdir.return_value = None
+    with patch("os.makedirs") as mock_makedirs:
+        mock_makedirs.return_value = None
         assert pl.validate_filename("valid_filename.csv") is True
 
+def test_async_monitor_writes_queued_samples(tmp_path):
+    args = SimpleNamespace(time=1)
+    pl._stop.set()
+    try:
+        with patch("automation_scripts.performance_logger.get_system_data", return_value={"stats": {}}), \
+             patch("automation_scripts.performance_logger.log_to_csv", return_value=True) as mock_log:
+            pl._run_async_monitor(args, str(tmp_path / "out.csv"))
+            mock_log.assert_called_once()
+    finally:
+        pl._stop.clear()
+
+def test_perf_logger_main_monitor_async_dispatch(monkeypatch, tmp_path):
+    output = str(tmp_path / "out.csv")
+    monkeypatch.setattr("sys.argv", ["prog", "--monitor", "--async", "--output", output])
+    with patch("automation_scripts.performance_logger._run_async_monitor") as mock_async:
+        pl.main()
+        mock_async.assert_called_once()
+
 def test_perf_logger_main_one_time(monkeypatch):
     monkeypatch.setattr("sys.argv", ["prog", "--output", "test.csv"])
     with patch("automation_scripts.performance_logger.log_data", return_value=True):
@@ -0,0 +1,50 @@
+import json
+import socket
+import threading
+import pytest
+from unittest.mock import patch
+from automation_scripts import _common, stats_daemon
+
+MOCK_STATS = {"cpu": {"overall_percent": 70}, "memory": {"percent": 50}}
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    socket_path = str(tmp_path / "stats.sock")
+    with patch.object(stats_daemon.SHARED_MONITOR, "get_system_stats", return_value=MOCK_STATS):
+        thread = threading.Thread(target=stats_daemon.listen_forever, args=(socket_path,), daemon=True)
+        thread.start()
+        # Wait for the socket file to exist before letting the test connect
+        for _ in range(100):
+            if (tmp_path / "stats.sock").exists():
+                break
+            threading.Event().wait(0.01)
+        try:
+            yield socket_path
+        finally:
+            stats_daemon._stop.set()
+            thread.join(timeout=3)
+            stats_daemon._stop.clear()
+
+def test_daemon_replies_to_stat(running_daemon):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5.0)
+        sock.connect(running_daemon)
+        sock.sendall(b"STAT\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    assert json.loads(line) == {"stats": MOCK_STATS}
+
+def test_get_stats_uses_daemon(running_daemon, monkeypatch):
+    monkeypatch.setattr(_common, "_SOCKET_PATH", running_daemon)
+    try:
+        result = _common.get_stats()
+        assert result == {"stats": MOCK_STATS}
+        # The connection stays open for the next poll
+        assert _common._daemon_sock is not None
+    finally:
+        _common._close_daemon()
+
+def test_get_stats_falls_back_when_daemon_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(_common, "_SOCKET_PATH", str(tmp_path / "missing.sock"))
+    with patch.object(_common.SHARED_MONITOR, "get_system_stats", return_value=MOCK_STATS):
+        assert _common.get_stats() == {"stats": MOCK_STATS}